@@ -7,7 +7,9 @@ This extension allows you to automagically generate DocFX YAML from your Python
 import os
 import inspect
 import re
-from functools import partial
+import subprocess
+from collections import defaultdict
+from functools import partial, lru_cache
 from itertools import zip_longest
 
 try:
@@ -15,7 +17,12 @@ try:
 except ImportError:
     from commands import getoutput
 
-from yaml import safe_dump as dump
+from yaml import dump
+try:
+    # libyaml based dumper, much faster when PyYAML has been built with it
+    from yaml import CSafeDumper as Dumper
+except ImportError:
+    from yaml import SafeDumper as Dumper
 
 from sphinx.util.console import darkgreen, bold
 from sphinx.util import ensuredir
@@ -66,11 +73,15 @@ def build_init(app):
         raise ExtensionError('You must configure an docfx_yaml_output setting')
 
     # This stores YAML object for modules
-    app.env.docfx_yaml_modules = {}
+    app.env.docfx_yaml_modules = defaultdict(list)
     # This stores YAML object for classes
-    app.env.docfx_yaml_classes = {}
+    app.env.docfx_yaml_classes = defaultdict(list)
     # This stores YAML object for functions
-    app.env.docfx_yaml_functions = {}
+    app.env.docfx_yaml_functions = defaultdict(list)
+    # This indexes the YAML object of each module by module name
+    app.env.docfx_yaml_module_index = {}
+    # This indexes the YAML object of each class by class name
+    app.env.docfx_yaml_class_index = {}
     # This store the data extracted from the info fields
     app.env.docfx_info_field_data = {}
     # This stores signature for functions and methods
@@ -84,21 +95,39 @@ def build_init(app):
         app.env.docfx_remote = remote.split('\t')[1].split(' ')[0]
     except Exception:
         app.env.docfx_remote = None
-    try:
-        app.env.docfx_branch = getoutput('git rev-parse --abbrev-ref HEAD').strip()
-    except Exception:
-        app.env.docfx_branch = None
 
+    # Get both the repo root and the branch from a single git process.
+    # Only stdout is parsed, git errors or warnings would shift the lines,
+    # and each value is taken on its own so a failed branch lookup keeps the root.
     try:
-        app.env.docfx_root = getoutput('git rev-parse --show-toplevel').strip()
-    except Exception:
-        app.env.docfx_root = None
-
-    patch_docfields(app)
+        rev_parse = subprocess.run(
+            ['git', 'rev-parse', '--show-toplevel', '--abbrev-ref', 'HEAD'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        ).stdout.splitlines()
+    except OSError: # git isn't installed
+        rev_parse = []
+
+    app.env.docfx_root = rev_parse[0].strip() if len(rev_parse) > 0 else None
+    app.env.docfx_branch = rev_parse[1].strip() if len(rev_parse) > 1 else None
+
+    # This stores the folders stripped from source paths to make them relative:
+    # the git repo, then installed packages and the standard library for global imports
+    import_path = os.path.dirname(inspect.getfile(os))
+    app.env.docfx_source_prefixes = [
+        prefix for prefix in (
+            app.env.docfx_root,
+            os.path.join(import_path, 'site-packages'),
+            import_path,
+        ) if prefix
+    ]
 
     app.docfx_transform_node = partial(transform_node, app)
     app.docfx_transform_string = partial(transform_string, app)
 
+    patch_docfields(app)
+
 
 def _get_cls_module(_type, name):
     """
@@ -111,13 +140,13 @@ def _get_cls_module(_type, name):
     """
     cls = None
     if _type in [FUNCTION, EXCEPTION]:
-        module = '.'.join(name.split('.')[:-1])
+        module = name.rpartition('.')[0]
     elif _type in [METHOD, ATTRIBUTE]:
-        cls = '.'.join(name.split('.')[:-1])
-        module = '.'.join(name.split('.')[:-2])
+        cls = name.rpartition('.')[0]
+        module = cls.rpartition('.')[0]
     elif _type in [CLASS]:
         cls = name
-        module = '.'.join(name.split('.')[:-1])
+        module = name.rpartition('.')[0]
     elif _type in [MODULE]:
         module = name
     else:
@@ -250,6 +279,36 @@ def _extract_signature(obj_sig):
     return signature, parameters
 
 
+_NO_SOURCE = object()
+# This caches source info by object id, including objects without Python source
+_source_info_cache = {}
+
+
+def _get_source_info(obj):
+    """
+    Get the source file and start line of an object.
+
+    Source lookups stat and tokenize files, so they're cached per object,
+    and failures are cached as well so C extension members aren't retried.
+    ``getsourcelines`` already resolves the source file, so the path is
+    taken from the cheaper ``getfile`` once the source is known to exist.
+    """
+    key = id(obj)
+    if key not in _source_info_cache:
+        try:
+            start_line = inspect.getsourcelines(obj)[1] # Raise OSError for a .pyd file
+            source_info = (inspect.getfile(obj), start_line)
+        except (TypeError, OSError):
+            source_info = _NO_SOURCE
+        # Hold obj so that its id can't be reused by another object
+        _source_info_cache[key] = (obj, source_info)
+
+    source_info = _source_info_cache[key][1]
+    if source_info is _NO_SOURCE:
+        raise TypeError()
+    return source_info
+
+
 def _create_datam(app, cls, module, name, _type, obj, lines=None):
     """
     Build the data structure for an autodoc class
@@ -272,8 +331,6 @@ def _create_datam(app, cls, module, name, _type, obj, lines=None):
         return path
 
 
-    if lines is None:
-        lines = []
     short_name = name.split('.')[-1]
     args = []
     try:
@@ -298,19 +355,17 @@ def _create_datam(app, cls, module, name, _type, obj, lines=None):
         sig = None
 
     try:
-        full_path = inspect.getsourcefile(obj)
-        if full_path is None: # Meet a .pyd file
-            raise TypeError()
-        # Sub git repo path
-        path = full_path.replace(app.env.docfx_root, '')
-        # Support global file imports, if it's installed already
-        import_path = os.path.dirname(inspect.getfile(os))
-        path = path.replace(os.path.join(import_path, 'site-packages'), '')
-        path = path.replace(import_path, '')
+        full_path, start_line = _get_source_info(obj)
+        path = full_path
+        # Sub git repo path, or installed package path
+        for prefix in app.env.docfx_source_prefixes:
+            if path.startswith(prefix):
+                path = path[len(prefix):]
+                break
 
         # Make relative
-        path = path.replace(os.sep, '', 1)
-        start_line = inspect.getsourcelines(obj)[1]
+        if path.startswith(os.sep):
+            path = path[len(os.sep):]
 
         path = _update_friendly_package_name(path)
 
@@ -349,7 +404,7 @@ def _create_datam(app, cls, module, name, _type, obj, lines=None):
     }
 
     # Only add summary to parts of the code that we don't get it from the monkeypatch
-    if _type == MODULE:
+    if _type == MODULE and lines:
         lines = _resolve_reference_in_module_summary(lines)
         summary = app.docfx_transform_string('\n'.join(_refact_example_in_module_summary(lines)))
         if summary:
@@ -373,9 +428,13 @@ def _create_datam(app, cls, module, name, _type, obj, lines=None):
     return datam
 
 
+@lru_cache(maxsize=None)
 def _fullname(obj):
     """
     Get the fullname from a Python object
+
+    Bases such as ``object`` or ``Exception`` recur across a codebase,
+    so their names are cached.
     """
     return obj.__module__ + "." + obj.__name__
 
@@ -397,16 +456,12 @@ def process_docstring(app, _type, name, obj, options, lines):
     datam = _create_datam(app, cls, module, name, _type, obj, lines)
 
     if _type == MODULE:
-        if module not in app.env.docfx_yaml_modules:
-            app.env.docfx_yaml_modules[module] = [datam]
-        else:
-            app.env.docfx_yaml_modules[module].append(datam)
+        app.env.docfx_yaml_modules[module].append(datam)
+        app.env.docfx_yaml_module_index.setdefault(module, datam)
 
     if _type == CLASS:
-        if cls not in app.env.docfx_yaml_classes:
-            app.env.docfx_yaml_classes[cls] = [datam]
-        else:
-            app.env.docfx_yaml_classes[cls].append(datam)
+        app.env.docfx_yaml_classes[cls].append(datam)
+        app.env.docfx_yaml_class_index.setdefault(cls, datam)
 
     if _type == FUNCTION and app.config.autodoc_functions:
         if datam['uid'] is None:
@@ -415,10 +470,7 @@ def process_docstring(app, _type, name, obj, options, lines):
             cls = name
         if cls is None:
             raise ValueError("cls is None for name='{1}' {0}".format(datam, name))
-        if cls not in app.env.docfx_yaml_functions:
-            app.env.docfx_yaml_functions[cls] = [datam]
-        else:
-            app.env.docfx_yaml_functions[cls].append(datam)
+        app.env.docfx_yaml_functions[cls].append(datam)
 
     insert_inheritance(app, _type, obj, datam)
     insert_children_on_module(app, _type, datam)
@@ -437,100 +489,89 @@ def process_signature(app, _type, name, obj, options, signature, return_annotati
 
 def insert_inheritance(app, _type, obj, datam):
 
-    def collect_inheritance(base, to_add):
+    def collect_inheritance(base, to_add, visited):
         for new_base in base.__bases__:
+            if new_base is object:
+                continue
             new_add = {'type': _fullname(new_base)}
-            collect_inheritance(new_base, new_add)
+            # Only expand each base once, a diamond would walk shared bases repeatedly
+            if new_base not in visited:
+                visited.add(new_base)
+                collect_inheritance(new_base, new_add, visited)
             if 'inheritance' not in to_add:
                 to_add['inheritance'] = []
             to_add['inheritance'].append(new_add)
 
-    if hasattr(obj, '__bases__'):
-        if 'inheritance' not in datam:
-            datam['inheritance'] = []
-        for base in obj.__bases__:
-            to_add = {'type': _fullname(base)}
-            collect_inheritance(base, to_add)
-            datam['inheritance'].append(to_add)
+    # Only classes have bases worth documenting
+    if _type not in [CLASS, EXCEPTION] or not hasattr(obj, '__bases__'):
+        return
+
+    collect_inheritance(obj, datam, set())
 
 
 def insert_children_on_module(app, _type, datam):
     """
     Insert children of a specific module
     """
+    if _type not in [FUNCTION, CLASS, EXCEPTION, MODULE]:
+        return
 
-    if MODULE not in datam or datam[MODULE] not in app.env.docfx_yaml_modules:
+    if MODULE not in datam or datam[MODULE] not in app.env.docfx_yaml_module_index:
         return
-    insert_module = app.env.docfx_yaml_modules[datam[MODULE]]
     # Find the module which the datam belongs to
-    for obj in insert_module:
-        # Add standardlone function to global class
-        if _type in [FUNCTION] and \
-                obj['type'] == MODULE and \
-                obj[MODULE] == datam[MODULE]:
-            obj['children'].append(datam['uid'])
+    obj = app.env.docfx_yaml_module_index[datam[MODULE]]
+    # Add standardlone function to global class
+    if _type in [FUNCTION]:
+        obj['children'].append(datam['uid'])
 
-            # If it is a function, add this to its module. No need for class and module since this is
-            # done before calling this function.
-            insert_module.append(datam)
+        # If it is a function, add this to its module. No need for class and module since this is
+        # done before calling this function.
+        app.env.docfx_yaml_modules[datam[MODULE]].append(datam)
 
-            obj['references'].append(_create_reference(datam, parent=obj['uid']))
-            break
-        # Add classes & exceptions to module
-        if _type in [CLASS, EXCEPTION] and \
-                obj['type'] == MODULE and \
-                obj[MODULE] == datam[MODULE]:
-            obj['children'].append(datam['uid'])
-            obj['references'].append(_create_reference(datam, parent=obj['uid']))
-            break
+        obj['references'].append(_create_reference(datam, parent=obj['uid']))
+    # Add classes & exceptions to module
+    if _type in [CLASS, EXCEPTION]:
+        obj['children'].append(datam['uid'])
+        obj['references'].append(_create_reference(datam, parent=obj['uid']))
 
     if _type in [MODULE]: # Make sure datam is a module.
         # Add this module(datam) to parent module node
         if datam[MODULE].count('.') >= 1:
             parent_module_name = '.'.join(datam[MODULE].split('.')[:-1])
 
-            if parent_module_name not in app.env.docfx_yaml_modules:
+            if parent_module_name not in app.env.docfx_yaml_module_index:
                 return
 
-            insert_module = app.env.docfx_yaml_modules[parent_module_name]
-
-            for obj in insert_module:
-                if obj['type'] == MODULE and obj[MODULE] == parent_module_name:
-                    obj['children'].append(datam['uid'])
-                    obj['references'].append(_create_reference(datam, parent=obj['uid']))
-                    break
+            obj = app.env.docfx_yaml_module_index[parent_module_name]
+            obj['children'].append(datam['uid'])
+            obj['references'].append(_create_reference(datam, parent=obj['uid']))
 
         # Add datam's children modules to it. Based on Python's passing by reference.
         # If passing by reference would be changed in python's future release.
-        # Time complex: O(N^2)
-        for module, module_contents in app.env.docfx_yaml_modules.items():
+        # Time complex: O(N) per module, O(N^2) over all modules
+        for module, obj in app.env.docfx_yaml_module_index.items():
             if module != datam['uid'] and \
                     module[:module.rfind('.')] == datam['uid']: # Current module is submodule/subpackage of datam
-                for obj in module_contents: # Traverse module's contents to find the module itself.
-                    if obj['type'] == MODULE and obj['uid'] == module:
-                        datam['children'].append(module)
-                        datam['references'].append(_create_reference(obj, parent=module))
-                        break
+                datam['children'].append(module)
+                datam['references'].append(_create_reference(obj, parent=module))
 
 
 def insert_children_on_class(app, _type, datam):
     """
     Insert children of a specific class
     """
-    if CLASS not in datam:
+    if _type not in [METHOD, ATTRIBUTE]:
+        return
+
+    if CLASS not in datam or datam[CLASS] not in app.env.docfx_yaml_class_index:
         return
 
-    insert_class = app.env.docfx_yaml_classes[datam[CLASS]]
     # Find the class which the datam belongs to
-    for obj in insert_class:
-        if obj['type'] != CLASS:
-            continue
-        # Add methods & attributes to class
-        if _type in [METHOD, ATTRIBUTE] and \
-                obj[CLASS] == datam[CLASS]:
-            obj['children'].append(datam['uid'])
-            obj['references'].append(_create_reference(datam, parent=obj['uid']))
-            insert_class.append(datam)
+    obj = app.env.docfx_yaml_class_index[datam[CLASS]]
+    # Add methods & attributes to class
+    obj['children'].append(datam['uid'])
+    obj['references'].append(_create_reference(datam, parent=obj['uid']))
+    app.env.docfx_yaml_classes[datam[CLASS]].append(datam)
 
 
 def insert_children_on_function(app, _type, datam):
@@ -575,6 +616,10 @@ def build_finished(app, exception):
                     obj['type'] = 'package'
                     return
 
+    def write_yaml(out_file, content):
+        with open(out_file, 'w') as out_file_obj:
+            out_file_obj.write('### YamlMime:UniversalReference\n' + content)
+
 
     normalized_outdir = os.path.normpath(os.path.join(
         app.builder.outdir,  # Output Directory for Builder
@@ -726,20 +771,21 @@ def build_finished(app, exception):
             if app.verbosity >= 1:
                 app.info(bold('[docfx_yaml] ') + darkgreen('Outputting %s' % filename))
 
-            with open(out_file, 'w') as out_file_obj:
-                out_file_obj.write('### YamlMime:UniversalReference\n')
-                try:
-                    dump(
-                        {
-                            'items': yaml_data,
-                            'references': references,
-                            'api_name': [],  # Hack around docfx YAML
-                        },
-                        out_file_obj,
-                        default_flow_style=False
-                    )
-                except Exception as e:
-                    raise ValueError("Unable to dump object\n{0}".format(yaml_data)) from e
+            # Serialize in memory first so the file is written in one go
+            try:
+                content = dump(
+                    {
+                        'items': yaml_data,
+                        'references': references,
+                        'api_name': [],  # Hack around docfx YAML
+                    },
+                    Dumper=Dumper,
+                    default_flow_style=False
+                )
+            except Exception as e:
+                raise ValueError("Unable to dump object\n{0}".format(yaml_data)) from e
+
+            write_yaml(out_file, content)
 
             file_name_set.add(filename)
 
@@ -768,7 +814,9 @@ def build_finished(app, exception):
                     'name': app.config.project,
                     'items': [{'name': 'Overview', 'uid': 'project-' + app.config.project}] + toc_yaml
                 }],
-                default_flow_style=False,
+                Dumper=Dumper,
+                # Leaf entries are flat name/uid maps, emit them on one line each
+                default_flow_style=None,
             )
         )
 
@@ -783,25 +831,24 @@ def build_finished(app, exception):
             'fullname': item.get('name', ''),
             'isExternal': False
         })
-    with open(index_file, 'w') as index_file_obj:
-        index_file_obj.write('### YamlMime:UniversalReference\n')
-        dump(
-            {
-                'items': [{
-                    'uid': 'project-' + app.config.project,
-                    'name': app.config.project,
-                    'fullName': app.config.project,
-                    'langs': ['python'],
-                    'type': 'package',
-                    'kind': 'distribution',
-                    'summary': '',
-                    'children': index_children
-                }],
-                'references': index_references
-            },
-            index_file_obj,
-            default_flow_style=False
-        )
+    content = dump(
+        {
+            'items': [{
+                'uid': 'project-' + app.config.project,
+                'name': app.config.project,
+                'fullName': app.config.project,
+                'langs': ['python'],
+                'type': 'package',
+                'kind': 'distribution',
+                'summary': '',
+                'children': index_children
+            }],
+            'references': index_references
+        },
+        Dumper=Dumper,
+        default_flow_style=False
+    )
+    write_yaml(index_file, content)
 
 
 def missing_reference(app, env, node, contnode):
@@ -1,6 +1,5 @@
 import re
 from docutils import nodes
-from functools import partial
 
 from sphinx.util.docfields import _is_single_paragraph
 from sphinx.util import docfields
@@ -8,10 +7,18 @@ from sphinx import directives, addnodes
 from sphinx import addnodes
 
 from sphinx.addnodes import desc, desc_signature
-from .utils import transform_node as _transform_node
 from .nodes import remarks
 
 TYPE_SEP_PATTERN = '(\[|\]|, |\(|\))'
+_TYPE_SEP = re.compile(TYPE_SEP_PATTERN)
+_OR_SPLIT = re.compile('[ \n]or[ \n]')
+_XREF_SYMBOLS = re.compile('[@~\n]')
+# Map desc types onto the docfx types they're documented as
+TYPE_MAPPING = {
+    "staticmethod": "method",
+    "classmethod": "method",
+    "exception": "class"
+}
 
 def _get_desc_data(node):
     assert node.tagname == 'desc'
@@ -130,6 +137,90 @@ def _hacked_transform(typemap, node):
     return (entries, types)
 
 
+def _make_param(_id, _description, _type=None, _required=None):
+    ret = {
+        'id': _id,
+        'description': _description.strip(" \n\r\t")
+    }
+    if _type:
+        ret['type'] = _type
+
+    if _required is not None:
+        ret['isRequired'] = _required
+
+    return ret
+
+
+def _resolve_type(data_type):
+    # Remove @ ~ and \n for cross reference in parameter/return value type to apply to docfx correctly
+    data_type = _XREF_SYMBOLS.sub('', data_type)
+
+    # Add references for docfx to resolve ref if type contains TYPE_SEP_PATTERN
+    _spec_list = []
+    _spec_fullnames = _TYPE_SEP.split(data_type)
+
+    _added_reference = {}
+    if len(_spec_fullnames) > 1:
+        _added_reference_name = ''
+        for _spec_fullname in _spec_fullnames:
+            if _spec_fullname != '':
+                _spec = {}
+                _spec['name'] = _spec_fullname.split('.')[-1]
+                _spec['fullName'] = _spec_fullname
+                if _TYPE_SEP.match(_spec_fullname) is None:
+                    _spec['uid'] = _spec_fullname
+                _spec_list.append(_spec)
+                _added_reference_name += _spec['name']
+
+        _added_reference = {
+            'uid': data_type,
+            'name': _added_reference_name,
+            'fullName': data_type,
+            'spec.python': _spec_list
+        }
+
+    return data_type, _added_reference
+
+
+def _resolve_types(data_types, references):
+    # Support or in types, adding references of the resolved types
+    _types = []
+    for _s_type in _OR_SPLIT.split(data_types):
+        _s_type, _added_reference = _resolve_type(_s_type)
+        if _added_reference:
+            if len(references) == 0:
+                references.append(_added_reference)
+            elif any(r['uid'] != _added_reference['uid'] for r in references):
+                references.append(_added_reference)
+
+        _types.append(_s_type)
+    return _types
+
+
+def _extract_exception_desc(field_object):
+    ret = []
+    if len(field_object) > 0:
+        for field in field_object:
+            if 'field_name' == field[0].tagname and field[0].astext() == 'Raises':
+                assert field[1].tagname == 'field_body'
+                field_body = field[1]
+
+                children = [n for n in field_body
+                    if not isinstance(n, nodes.Invisible)]
+
+                for child in children:
+                    if isinstance (child, nodes.paragraph):
+                        pending_xref_index = child.first_child_matching_class(addnodes.pending_xref)
+                        if pending_xref_index is not None:
+                            pending_xref = child[pending_xref_index]
+                            raise_type_index = pending_xref.first_child_matching_class(nodes.literal)
+                            if raise_type_index is not None:
+                                raise_type = pending_xref[raise_type_index]
+                                ret.append({'type': pending_xref['reftarget'], 'desc': raise_type.astext()})
+
+    return ret
+
+
 def patch_docfields(app):
     """
     Grab syntax data from the Sphinx info fields.
@@ -145,7 +236,13 @@ def patch_docfields(app):
     using the :class:`docfx_yaml.writers.MarkdownWriter`.
     """
 
-    transform_node = partial(_transform_node, app)
+    transform_node = app.docfx_transform_node
+
+    def transform_para(para_field):
+        if isinstance(para_field, addnodes.pending_xref):
+            return transform_node(para_field)
+        else:
+            return para_field.astext()
 
     def get_data_structure(entries, types, field_object):
         """
@@ -160,78 +257,6 @@ def patch_docfields(app):
             'references': [],
         }
 
-        def make_param(_id, _description, _type=None, _required=None):
-            ret = {
-                'id': _id,
-                'description': _description.strip(" \n\r\t")
-            }
-            if _type:
-                ret['type'] = _type
-
-            if _required is not None:
-                ret['isRequired'] = _required
-
-            return ret
-
-        def transform_para(para_field):
-            if isinstance(para_field, addnodes.pending_xref):
-                return transform_node(para_field)
-            else:
-                return para_field.astext()
-
-        def resolve_type(data_type):
-            # Remove @ ~ and \n for cross reference in parameter/return value type to apply to docfx correctly
-            data_type = re.sub('[@~\n]', '', data_type)
-
-            # Add references for docfx to resolve ref if type contains TYPE_SEP_PATTERN
-            _spec_list = []
-            _spec_fullnames = re.split(TYPE_SEP_PATTERN, data_type)
-
-            _added_reference = {}
-            if len(_spec_fullnames) > 1:
-                _added_reference_name = ''
-                for _spec_fullname in _spec_fullnames:
-                    if _spec_fullname != '':
-                        _spec = {}
-                        _spec['name'] = _spec_fullname.split('.')[-1]
-                        _spec['fullName'] = _spec_fullname
-                        if re.match(TYPE_SEP_PATTERN, _spec_fullname) is None:
-                            _spec['uid'] = _spec_fullname
-                        _spec_list.append(_spec)
-                        _added_reference_name += _spec['name']
-
-                _added_reference = {
-                    'uid': data_type,
-                    'name': _added_reference_name,
-                    'fullName': data_type,
-                    'spec.python': _spec_list
-                }
-
-            return data_type, _added_reference
-
-        def extract_exception_desc(field_object):
-            ret = []
-            if len(field_object) > 0:
-                for field in field_object:
-                    if 'field_name' == field[0].tagname and field[0].astext() == 'Raises':
-                        assert field[1].tagname == 'field_body'
-                        field_body = field[1]
-
-                        children = [n for n in field_body
-                            if not isinstance(n, nodes.Invisible)]
-
-                        for child in children:
-                            if isinstance (child, nodes.paragraph):
-                                pending_xref_index = child.first_child_matching_class(addnodes.pending_xref)
-                                if pending_xref_index is not None:
-                                    pending_xref = child[pending_xref_index]
-                                    raise_type_index = pending_xref.first_child_matching_class(nodes.literal)
-                                    if raise_type_index is not None:
-                                        raise_type = pending_xref[raise_type_index]
-                                        ret.append({'type': pending_xref['reftarget'], 'desc': raise_type.astext()})
-
-            return ret
-
         for entry in entries:
             if isinstance(entry, nodes.field):
                 # pass-through old field
@@ -249,16 +274,7 @@ def patch_docfields(app):
                     for returntype_node in content[1]:
                         returntype_ret = transform_node(returntype_node)
                         if returntype_ret:
-                            # Support or in returntype
-                            for returntype in re.split('[ \n]or[ \n]', returntype_ret):
-                                returntype, _added_reference = resolve_type(returntype)
-                                if _added_reference:
-                                    if len(data['references']) == 0:
-                                        data['references'].append(_added_reference)
-                                    elif any(r['uid'] != _added_reference['uid'] for r in data['references']):
-                                        data['references'].append(_added_reference)
-
-                                data['return'].setdefault('type', []).append(returntype)
+                            data['return'].setdefault('type', []).extend(_resolve_types(returntype_ret, data['references']))
                 if fieldtype.name == 'returnvalue':
                     returnvalue_ret = transform_node(content[1][0])
                     if returnvalue_ret:
@@ -272,42 +288,16 @@ def patch_docfields(app):
                         else:
                             _type = None
 
-                        _para_types = []
+                        _para_types = _resolve_types(_type, data['references']) if _type else []
                         if fieldtype.name == 'parameter' or fieldtype.name == 'keyword':
-                            if _type:
-                                # Support or in parameter type
-                                for _s_type in re.split('[ \n]or[ \n]', _type):
-                                    _s_type, _added_reference = resolve_type(_s_type)
-                                    if _added_reference:
-                                        if len(data['references']) == 0:
-                                            data['references'].append(_added_reference)
-                                        elif any(r['uid'] != _added_reference['uid'] for r in data['references']):
-                                            data['references'].append(_added_reference)
-
-                                    _para_types.append(_s_type)
-
-
-
-                            _data = make_param(_id=_id, _type=_para_types, _description=_description, _required=False if fieldtype.name == 'keyword' else True)
+                            _data = _make_param(_id=_id, _type=_para_types, _description=_description, _required=False if fieldtype.name == 'keyword' else True)
                             data['parameters'].append(_data)
 
                         if fieldtype.name == 'variable':
-                            if _type:
-                                # Support or in variable type
-                                for _s_type in re.split('[ \n]or[ \n]', _type):
-                                    _s_type, _added_reference = resolve_type(_s_type)
-                                    if _added_reference:
-                                        if len(data['references']) == 0:
-                                            data['references'].append(_added_reference)
-                                        elif any(r['uid'] != _added_reference['uid'] for r in data['references']):
-                                            data['references'].append(_added_reference)
-
-                                    _para_types.append(_s_type)
-
-                            _data = make_param(_id=_id, _type=_para_types, _description=_description)
+                            _data = _make_param(_id=_id, _type=_para_types, _description=_description)
                             data['variables'].append(_data)
 
-                    ret_list = extract_exception_desc(field_object)
+                    ret_list = _extract_exception_desc(field_object)
                     for ret in ret_list:
                         # only use type in exceptions
                         data.setdefault('exceptions', []).append({
@@ -321,18 +311,116 @@ def patch_docfields(app):
 
         @staticmethod
         def type_mapping(type_name):
-            mapping = {
-                "staticmethod": "method",
-                "classmethod": "method",
-                "exception": "class"
-            }
-
-            return mapping[type_name] if type_name in mapping else type_name
+            return TYPE_MAPPING.get(type_name, type_name)
 
         def __init__(self, directive):
             self.directive = directive
             super(PatchedDocFieldTransformer, self).__init__(directive)
 
+        def _transform_remarks(self, node, child, data, summary):
+            data['remarks'] = transform_node(child)
+
+        def _transform_desc(self, node, child, data, summary):
+            # Don't recurse into child nodes
+            if child.get('desctype') == 'attribute':
+                attribute_map = {} # Used for detecting duplicated attributes in intermediate data and merge them
+
+                for item in child:
+                    if isinstance(item, desc_signature) and any(isinstance(n, addnodes.desc_annotation) for n in item):
+                        # capture attributes data and cache it
+                        data.setdefault('added_attribute', [])
+
+                        item_ids = item.get('ids', [''])
+
+                        if len(item_ids) == 0: # find a node with no 'ids' attribute
+                            curuid = item.get('module', '') + '.' + item.get('fullname', '')
+                            # generate its uid by module and fullname
+                        else:
+                            curuid = item_ids[0]
+
+                        if len(curuid) > 0:
+                            parent = curuid[:curuid.rfind('.')]
+                            name = item.children[0].astext()
+
+                            if curuid in attribute_map:
+                                if len(item_ids) == 0: # ensure the order of docstring attributes and real attributes is fixed
+                                    attribute_map[curuid]['syntax']['content'] += (' ' + item.astext())
+                                    # concat the description of duplicated nodes
+                                else:
+                                    attribute_map[curuid]['syntax']['content'] = item.astext() + ' ' + attribute_map[curuid]['syntax']['content']
+                            else:
+                                if _is_desc_of_enum_class(node):
+                                    addedData = {
+                                        'uid': curuid,
+                                        'id': name,
+                                        'parent': parent,
+                                        'langs': ['python'],
+                                        'name': name,
+                                        'fullName': curuid,
+                                        'type': item.parent.get('desctype'),
+                                        'module': item.get('module'),
+                                        'syntax': {
+                                            'content': item.astext(),
+                                            'return': {
+                                                'type': [parent]
+                                            }
+                                        }
+                                    }
+                                else:
+                                    addedData = {
+                                        'uid': curuid,
+                                        'class': parent,
+                                        'langs': ['python'],
+                                        'name': name,
+                                        'fullName': curuid,
+                                        'type': 'attribute',
+                                        'module': item.get('module'),
+                                        'syntax': {
+                                            'content': item.astext()
+                                        }
+                                    }
+
+                                attribute_map[curuid] = addedData
+                        else:
+                            raise Exception('ids of node: ' + repr(item) + ' is missing.')
+                            # no ids and no duplicate or uid can not be generated.
+                if 'added_attribute' in data:
+                    data['added_attribute'].extend(attribute_map.values()) # Add attributes data to a temp list
+
+        def _transform_field_list(self, node, child, data, summary):
+            (entries, types) = _hacked_transform(self.typemap, child)
+            _data = get_data_structure(entries, types, child)
+            data.update(_data)
+
+        def _transform_seealso(self, node, child, data, summary):
+            data['seealso'] = transform_node(child)
+
+        def _transform_admonition(self, node, child, data, summary):
+            if 'Example' not in child[0].astext():
+                self._transform_default(node, child, data, summary)
+                return
+
+            # Remove the admonition node
+            child_copy = child.deepcopy()
+            child_copy.pop(0)
+            data['example'] = transform_node(child_copy)
+
+        def _transform_default(self, node, child, data, summary):
+            content = transform_node(child)
+
+            # skip 'Bases' in summary
+            if not content.startswith('Bases: '):
+                summary.append(content)
+
+        # Handlers for the immediate children of a node, by tagname (the node class name)
+        child_handlers = {
+            remarks.__name__: _transform_remarks,
+            addnodes.desc.__name__: _transform_desc,
+            nodes.field_list.__name__: _transform_field_list,
+            addnodes.seealso.__name__: _transform_seealso,
+            nodes.admonition.__name__: _transform_admonition,
+        }
+
         def transform_all(self, node):
             """Transform all field list children of a node."""
             # don't traverse, only handle field lists that are immediate children
@@ -340,94 +428,8 @@ def patch_docfields(app):
             data = {}
             name, uid = _get_desc_data(node.parent)
             for child in node:
-                if isinstance(child, remarks):
-                    remarks_string = transform_node(child)
-                    data['remarks'] = remarks_string
-                elif isinstance(child, addnodes.desc):
-                    if child.get('desctype') == 'attribute':
-                        attribute_map = {} # Used for detecting duplicated attributes in intermediate data and merge them
-
-                        for item in child:
-                            if isinstance(item, desc_signature) and any(isinstance(n, addnodes.desc_annotation) for n in item):
-                                # capture attributes data and cache it
-                                data.setdefault('added_attribute', [])
-
-                                item_ids = item.get('ids', [''])
-
-                                if len(item_ids) == 0: # find a node with no 'ids' attribute
-                                    curuid = item.get('module', '') + '.' + item.get('fullname', '')
-                                    # generate its uid by module and fullname
-                                else:
-                                    curuid = item_ids[0]
-
-                                if len(curuid) > 0:
-                                    parent = curuid[:curuid.rfind('.')]
-                                    name = item.children[0].astext()
-
-                                    if curuid in attribute_map:
-                                        if len(item_ids) == 0: # ensure the order of docstring attributes and real attributes is fixed
-                                            attribute_map[curuid]['syntax']['content'] += (' ' + item.astext())
-                                            # concat the description of duplicated nodes
-                                        else:
-                                            attribute_map[curuid]['syntax']['content'] = item.astext() + ' ' + attribute_map[curuid]['syntax']['content']
-                                    else:
-                                        if _is_desc_of_enum_class(node):
-                                            addedData = {
-                                                'uid': curuid,
-                                                'id': name,
-                                                'parent': parent,
-                                                'langs': ['python'],
-                                                'name': name,
-                                                'fullName': curuid,
-                                                'type': item.parent.get('desctype'),
-                                                'module': item.get('module'),
-                                                'syntax': {
-                                                    'content': item.astext(),
-                                                    'return': {
-                                                        'type': [parent]
-                                                    }
-                                                }
-                                            }
-                                        else:
-                                            addedData = {
-                                                'uid': curuid,
-                                                'class': parent,
-                                                'langs': ['python'],
-                                                'name': name,
-                                                'fullName': curuid,
-                                                'type': 'attribute',
-                                                'module': item.get('module'),
-                                                'syntax': {
-                                                    'content': item.astext()
-                                                }
-                                            }
-
-                                        attribute_map[curuid] = addedData
-                                else:
-                                    raise Exception('ids of node: ' + repr(item) + ' is missing.')
-                                    # no ids and no duplicate or uid can not be generated.
-                        if 'added_attribute' in data:
-                            data['added_attribute'].extend(attribute_map.values()) # Add attributes data to a temp list
-
-                    # Don't recurse into child nodes
-                    continue
-                elif isinstance(child, nodes.field_list):
-                    (entries, types) = _hacked_transform(self.typemap, child)
-                    _data = get_data_structure(entries, types, child)
-                    data.update(_data)
-                elif isinstance(child, addnodes.seealso):
-                    data['seealso'] = transform_node(child)
-                elif isinstance(child, nodes.admonition) and 'Example' in child[0].astext():
-                    # Remove the admonition node
-                    child_copy = child.deepcopy()
-                    child_copy.pop(0)
-                    data['example'] = transform_node(child_copy)
-                else:
-                    content = transform_node(child)
-
-                    # skip 'Bases' in summary
-                    if not content.startswith('Bases: '):
-                        summary.append(content)
+                handler = self.child_handlers.get(child.tagname, PatchedDocFieldTransformer._transform_default)
+                handler(self, node, child, data, summary)
 
             if "desctype" in node.parent and node.parent["desctype"] == 'class':
                 data.pop('exceptions', '') # Make sure class doesn't have 'exceptions' field.
@@ -435,9 +437,7 @@ def patch_docfields(app):
             if summary:
                 data['summary'] = '\n'.join(summary)
             # Don't include empty data
-            for key, val in data.copy().items():
-                if not val:
-                    del data[key]
+            data = {key: val for key, val in data.items() if val}
             data['type'] = PatchedDocFieldTransformer.type_mapping(node.parent["desctype"]) if "desctype" in node.parent else 'unknown'
             self.directive.env.docfx_info_field_data[uid] = data
             super(PatchedDocFieldTransformer, self).transform_all(node)
@@ -22,5 +22,7 @@ setup(
     packages=find_packages('.', exclude=['tests']),
     # trying to add files...
     include_package_data=True,
+    zip_safe=False,
+    python_requires='>=3.5',
     **extra_setup
 )
@@ -186,4 +186,28 @@ class InheritFoo(Foo, dict):
     """ Docstring of :class:`format.rst.foo.InheritFoo`.
     This class inherit from two classes: :class:`format.rst.foo.Foo` and :class:`format.rst.foo`.
     """
+    pass
+
+class InheritFooBase(Foo):
+    """ Docstring of :class:`format.rst.foo.InheritFooBase`.
+    This class is the shared base of :class:`format.rst.foo.InheritFooLeft` and :class:`format.rst.foo.InheritFooRight`.
+    """
+    pass
+
+class InheritFooLeft(InheritFooBase):
+    """ Docstring of :class:`format.rst.foo.InheritFooLeft`.
+    This class inherit from :class:`format.rst.foo.InheritFooBase`.
+    """
+    pass
+
+class InheritFooRight(InheritFooBase):
+    """ Docstring of :class:`format.rst.foo.InheritFooRight`.
+    This class inherit from :class:`format.rst.foo.InheritFooBase`.
+    """
+    pass
+
+class InheritFooDiamond(InheritFooLeft, InheritFooRight):
+    """ Docstring of :class:`format.rst.foo.InheritFooDiamond`.
+    This class inherit from two classes sharing a base: :class:`format.rst.foo.InheritFooLeft` and :class:`format.rst.foo.InheritFooRight`.
+    """
     pass
\ No newline at end of file
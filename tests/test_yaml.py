@@ -52,7 +52,11 @@ class YamlTests(unittest.TestCase):
                 "format.rst.foo.Foo.yml",
                 "format.rst.foo.FooException.InternalFoo.yml",
                 "format.rst.foo.FooException.yml",
-                "format.rst.foo.InheritFoo.yml"
+                "format.rst.foo.InheritFoo.yml",
+                "format.rst.foo.InheritFooBase.yml",
+                "format.rst.foo.InheritFooDiamond.yml",
+                "format.rst.foo.InheritFooLeft.yml",
+                "format.rst.foo.InheritFooRight.yml"
             ],
             "namespacepackage": [
                 "nspkg.native.native_foo.Foo.yml",
@@ -256,6 +260,28 @@ class YamlTests(unittest.TestCase):
                     'builtins.dict'
                 )
 
+                self.assertNotIn(
+                    'inheritance',
+                    data['items'][0]['inheritance'][0]
+                )  # Test builtins.object is not listed as a base of format.rst.foo.Foo
+
+            with open(os.path.join(self.build_path, self.yaml_files['class_files']['rst'][7])) as f:
+                # Test format.rst.foo.InheritFooDiamond.yml
+                data = yaml.safe_load(f)
+
+                self.assertEqual(
+                    data['items'][0]['inheritance'][0]['inheritance'][0],
+                    {
+                        'type': 'format.rst.foo.InheritFooBase',
+                        'inheritance': [{'type': 'format.rst.foo.Foo'}]
+                    }
+                )  # Test shared base is expanded under format.rst.foo.InheritFooLeft
+
+                self.assertEqual(
+                    data['items'][0]['inheritance'][1]['inheritance'][0],
+                    {'type': 'format.rst.foo.InheritFooBase'}
+                )  # Test shared base is not expanded again under format.rst.foo.InheritFooRight
+
     def test_source(self):
         """
         Test source info is parsed properly.